@@ -3,147 +3,305 @@
 Content Bot - Turns GitHub commits into social media draft posts
 """
 
+import hashlib
+import io
 import os
-import json
+import random
 import re
+import time
+from collections import namedtuple
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
 
+import orjson
 import typer
-import requests
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
 
 app = typer.Typer(help="Generate social media content from GitHub commits")
 
+# Secret patterns fused into one alternation so sanitizing is a single scan.
+# Specific token formats come before the generic long-alphanumeric catch-all.
+_SECRET_PATTERNS = [
+    r'sk-[A-Za-z0-9]{32,}',
+    r'ghp_[A-Za-z0-9]{36}',
+    r'ghs_[A-Za-z0-9]{36}',
+    r'password\s*[:=]\s*[^\s]+',
+    r'token\s*[:=]\s*[^\s]+',
+    r'[A-Za-z0-9]{20,}',
+]
+_SECRET_RE = re.compile("|".join(f"(?:{p})" for p in _SECRET_PATTERNS), re.IGNORECASE)
+_COMPANY_RE = re.compile(r'\b[A-Z][a-z]+(Corp|Inc)\b')
+
+# Anything _SECRET_RE can match contains ':' or '=' (password/token assignments)
+# or a run of 20+ alphanumerics (every other pattern), so text without either is safe to skip
+_SECRET_HINT_RE = re.compile(r'[:=]|[A-Za-z0-9]{20}')
+
+# Chore and test-only commits, matched against the commit title
+_SKIP_RE = re.compile(r'^(chore:|.*tests/)', re.IGNORECASE)
+
+# Explicit section markers in the LLM response
+_TWITTER_RE = re.compile(r'TWITTER:\s*(.*?)(?=LINKEDIN:|$)', re.DOTALL | re.IGNORECASE)
+_LINKEDIN_RE = re.compile(r'LINKEDIN:\s*(.*?)(?=TWITTER:|$)', re.DOTALL | re.IGNORECASE)
+_TWITTER_LABEL_RE = re.compile(r'^TWITTER:?\s*', re.IGNORECASE)
+_LINKEDIN_LABEL_RE = re.compile(r'^LINKEDIN:?\s*', re.IGNORECASE)
+# Short lines containing these are section headers, not post text
+HEADER_KEYWORDS = frozenset(['VERSION', 'CHARS', 'TWITTER', 'LINKEDIN'])
+TWITTER_LIMIT = 260
+LINKEDIN_LIMIT = 700
+MAX_REQUEST_ATTEMPTS = 5
+GITHUB_API_URL = "https://api.github.com"
+GITHUB_JSON_MEDIA_TYPE = "application/vnd.github.v3+json"
+SANITIZE_LIMIT = 4096  # Posts only ever quote a commit title and a short body excerpt
+
+# Commit fields the bot consumes, parsed once per commit
+CommitView = namedtuple("CommitView", "sha title body date html_url")
+
+def iter_views(commits: Iterable[Dict]) -> Iterator[CommitView]:
+    """Split each GitHub commit into the fields used downstream"""
+    for commit in commits:
+        message = commit['commit']['message']
+        title, _, body = message.partition('\n')
+        yield CommitView(
+            sha=commit['sha'],
+            title=title.strip(),
+            body=body.strip(),
+            date=commit['commit']['author']['date'][:10],
+            html_url=commit['html_url'],
+        )
+
 class ContentBot:
     def __init__(self):
+        # Load environment variables (imported here so --help stays cheap)
+        from dotenv import load_dotenv
+        load_dotenv()
+        
         self.github_token = os.getenv("TOKEN")
         self.openrouter_api_key = os.getenv("API")  # Using same env var for compatibility
         self.state_file = Path("state.json")
         self.output_dir = Path("out")
+        self.generation_cache_dir = self.output_dir / ".cache"
         
         if not self.github_token:
             typer.echo("❌ TOKEN not found in environment variables", err=True)
             raise typer.Exit(1)
         
+        # Created on first GitHub call, so requests is only imported when needed
+        self._session = None
+        
         # Ensure output directory exists
         self.output_dir.mkdir(exist_ok=True)
+        
+        # Read state once per run; save_state persists this same dict
+        self._state = self.load_state()
+        last_run_at = self._state.get("last_run_at")
+        self.last_run_at = self.parse_timestamp(last_run_at) if last_run_at else None
     
     def load_state(self) -> Dict:
         """Load state from state.json file"""
+        state = {"last_run_at": None}
         if self.state_file.exists():
-            with open(self.state_file, 'r') as f:
-                return json.load(f)
-        return {"last_run_at": None}
-    
-    def save_state(self) -> None:
-        """Save current state to state.json file"""
-        state = {
-            "last_run_at": datetime.now(timezone.utc).isoformat()
-        }
-        with open(self.state_file, 'w') as f:
-            json.dump(state, f, indent=2)
-    
-    def fetch_commits(self, repo: str, days: int) -> List[Dict]:
-        """Fetch commits from GitHub API"""
-        url = f"https://api.github.com/repos/{repo}/commits"
-        headers = {
-            "Authorization": f"token {self.github_token}",
-            "Accept": "application/vnd.github.v3+json"
-        }
+            state.update(orjson.loads(self.state_file.read_bytes()))
+        state.setdefault("commits_etag", {})
+        state.setdefault("commits_last_modified", {})
+        state.setdefault("last_seen_sha", {})
+        return state
+    
+    def save_state(self, latest_commit_at: Optional[str]) -> None:
+        """Save current state to state.json file, advancing last_run_at to the newest fetched commit"""
+        # A commit date, not the clock: anything pushed after the fetch is newer
+        # than every commit posted this run, so it is neither skipped nor repeated
+        if latest_commit_at:
+            latest = self.parse_timestamp(latest_commit_at)
+            if not self.last_run_at or latest > self.last_run_at:
+                self.last_run_at = latest
+                self._state["last_run_at"] = latest.isoformat()
+        self.write_json_atomic(self.state_file, self._state, pretty=True)
+    
+    def write_json_atomic(self, path: Path, data, pretty: bool = False) -> None:
+        """Write JSON to a temp file and swap it in, so a crash never leaves a truncated file"""
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0))
+        os.replace(tmp_path, path)
+    
+    def parse_timestamp(self, value: str) -> datetime:
+        """Parse an ISO timestamp, treating values without timezone info as UTC"""
+        if value.endswith('Z'):
+            value = value.replace('Z', '+00:00')
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed
+    
+    def get_since(self, window_start: datetime) -> datetime:
+        """Start of the new-commit range: just after the last processed commit, within the --days window"""
+        if self.last_run_at and self.last_run_at >= window_start:
+            # GitHub's since is inclusive and commit dates have one-second resolution
+            return self.last_run_at + timedelta(seconds=1)
+        return window_start
+    
+    @property
+    def session(self):
+        """Pooled requests session shared by all GitHub calls"""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            
+            # TLS connections are reused across calls. The adapter only retries
+            # connection errors: status retries (including Retry-After) are off so every
+            # response reaches _request_with_backoff, which handles 5xx and rate limits.
+            self._session = requests.Session()
+            self._session.headers.update({
+                "Authorization": f"token {self.github_token}",
+                "Accept": GITHUB_JSON_MEDIA_TYPE
+            })
+            self._session.mount("https://", HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=8,
+                max_retries=Retry(
+                    connect=3,
+                    read=0,
+                    status=0,
+                    backoff_factor=0.5,
+                    respect_retry_after_header=False,
+                    raise_on_status=False
+                )
+            ))
+        return self._session
+    
+    def _request_with_backoff(self, method: str, url: str, **kwargs):
+        """Send a request, sleeping until the rate limit resets and retrying GET 5xx with jittered backoff"""
+        for attempt in range(MAX_REQUEST_ATTEMPTS):
+            response = self.session.request(method, url, **kwargs)
+            
+            if response.status_code in (403, 429) and response.headers.get("X-RateLimit-Remaining") == "0":
+                reset_at = int(response.headers.get("X-RateLimit-Reset", "0"))
+                wait = max(0, reset_at - time.time()) + random.uniform(0, 1)
+                typer.echo(f"⏳ GitHub rate limit reached, waiting {wait:.0f}s for reset")
+            elif method == "GET" and response.status_code >= 500:
+                # A 5xx on POST may come after the write happened; retrying could duplicate it
+                wait = 2 ** attempt + random.random()
+            else:
+                return response
+            
+            if attempt < MAX_REQUEST_ATTEMPTS - 1:
+                time.sleep(wait)
+        
+        return response
+    
+    def _gh_get(self, path: str, params: Optional[Dict] = None, headers: Optional[Dict] = None):
+        """GET a GitHub REST path as plain JSON.
+        
+        Accept is always forced to the v3 JSON media type, so no caller can
+        opt into the diff/patch representations that inline whole file diffs
+        into commit payloads. All GitHub reads should go through here.
+        """
+        headers = {**(headers or {}), "Accept": GITHUB_JSON_MEDIA_TYPE}
+        return self._request_with_backoff("GET", f"{GITHUB_API_URL}/{path}", params=params, headers=headers)
+    
+    def fetch_commits(self, repo: str, since_iso: str) -> List[Dict]:
+        """Fetch commits since since_iso, after a conditional per_page=1 probe of the latest SHA"""
+        import requests
+        
+        path = f"repos/{repo}/commits"
         
-        # Calculate date range
-        since_date = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+        # Conditional probe: a 304 means the commits list is unchanged since last run
+        headers = {}
+        etag = self._state["commits_etag"].get(repo)
+        last_modified = self._state["commits_last_modified"].get(repo)
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        
+        try:
+            response = self._gh_get(path, params={"per_page": 1}, headers=headers)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            typer.echo(f"❌ Error fetching commits: {e}", err=True)
+            raise typer.Exit(1)
+        
+        if response.status_code == 304:
+            return []
+        self._state["commits_etag"][repo] = response.headers.get("ETag")
+        self._state["commits_last_modified"][repo] = response.headers.get("Last-Modified")
+        
+        # The probe body can still match if the validators changed for other reasons
+        latest = orjson.loads(response.content)
+        if not latest:
+            return []
+        latest_sha = latest[0]['sha']
+        if latest_sha == self._state["last_seen_sha"].get(repo):
+            return []
+        self._state["last_seen_sha"][repo] = latest_sha
         
         params = {
-            "since": since_date,
+            "since": since_iso,
             "per_page": 100
         }
         
         try:
-            response = requests.get(url, headers=headers, params=params)
+            response = self._gh_get(path, params=params)
             response.raise_for_status()
-            return response.json()
+            commits = orjson.loads(response.content)
+            last_link = response.links.get("last")
+            if last_link:
+                commits.extend(self.fetch_remaining_pages(path, params, last_link["url"]))
         except requests.exceptions.RequestException as e:
             typer.echo(f"❌ Error fetching commits: {e}", err=True)
             raise typer.Exit(1)
-    
-    def filter_commits_by_content(self, commits: List[Dict]) -> List[Dict]:
-        """Filter out commits that are chores or tests"""
-        filtered_commits = []
         
-        for commit in commits:
-            commit_msg = commit['commit']['message'].lower()
-            
-            # Skip commits that start with 'chore:' or contain 'tests/'
-            if commit_msg.startswith('chore:') or 'tests/' in commit_msg:
-                continue
-                
-            filtered_commits.append(commit)
+        return commits
+    
+    def fetch_context_commits(self, repo: str, since_iso: str, until_iso: str) -> List[Dict]:
+        """Fetch the 3 newest commits from before the last run, as background for the prompt"""
+        import requests
         
-        return filtered_commits
+        try:
+            response = self._gh_get(f"repos/{repo}/commits", params={"since": since_iso, "until": until_iso, "per_page": 3})
+            response.raise_for_status()
+            return orjson.loads(response.content)
+        except requests.exceptions.RequestException as e:
+            typer.echo(f"⚠️ Could not fetch older commits for context: {e}")
+            return []
     
-    def filter_commits_by_state(self, commits: List[Dict]) -> List[Dict]:
-        state = self.load_state()
-        last_run_at = state.get("last_run_at")
+    def fetch_remaining_pages(self, path: str, params: Dict, last_url: str) -> List[Dict]:
+        """Fetch pages 2..last of a paginated listing concurrently, preserving page order"""
+        from concurrent.futures import ThreadPoolExecutor
         
-        if not last_run_at:
-            # First run - return all commits
-            return commits
+        last_page = int(parse_qs(urlparse(last_url).query)["page"][0])
         
-        # Parse last run timestamp - handle both with and without timezone
-        try:
-            if last_run_at.endswith('Z'):
-                last_run_time = datetime.fromisoformat(last_run_at.replace('Z', '+00:00'))
-            elif '+' in last_run_at or last_run_at.count('-') > 2:
-                last_run_time = datetime.fromisoformat(last_run_at)
-            else:
-                # No timezone info, assume local timezone and convert to UTC for comparison
-                last_run_time = datetime.fromisoformat(last_run_at).replace(tzinfo=timezone.utc)
-        except ValueError:
-            # Fallback for any parsing issues
-            last_run_time = datetime.fromisoformat(last_run_at).replace(tzinfo=timezone.utc)
+        def fetch_page(page: int) -> List[Dict]:
+            response = self._gh_get(path, params={**params, "page": page})
+            response.raise_for_status()
+            return orjson.loads(response.content)
         
-        new_commits = []
+        commits = []
+        with ThreadPoolExecutor(max_workers=min(8, last_page - 1)) as executor:
+            for page_commits in executor.map(fetch_page, range(2, last_page + 1)):
+                commits.extend(page_commits)
+        return commits
+    
+    def _iter_filter_by_content(self, commits: Iterable[CommitView]) -> Iterator[CommitView]:
+        """Filter out commits that are chores or tests"""
         for commit in commits:
-            commit_date_str = commit['commit']['author']['date']
-            # Parse commit date - GitHub API always returns UTC timestamps
-            if commit_date_str.endswith('Z'):
-                commit_date = datetime.fromisoformat(commit_date_str.replace('Z', '+00:00'))
-            else:
-                commit_date = datetime.fromisoformat(commit_date_str)
-                if commit_date.tzinfo is None:
-                    commit_date = commit_date.replace(tzinfo=timezone.utc)
-            
-            if commit_date > last_run_time:
-                new_commits.append(commit)
-        
-        return new_commits
+            # Skip commits whose title starts with 'chore:' or mentions 'tests/'
+            if not _SKIP_RE.match(commit.title):
+                yield commit
+    
+    def _sanitize_commit(self, commit: CommitView) -> CommitView:
+        """Return the commit with secrets and client names removed from its message"""
+        return commit._replace(title=self.sanitize_content(commit.title), body=self.sanitize_content(commit.body))
     
     def sanitize_content(self, text: str) -> str:
-        secret_patterns = [
-            r'[A-Za-z0-9]{20,}',
-            r'sk-[A-Za-z0-9]{32,}',
-            r'ghp_[A-Za-z0-9]{36}',
-            r'ghs_[A-Za-z0-9]{36}',
-            r'password\s*[:=]\s*[^\s]+',
-            r'token\s*[:=]\s*[^\s]+',
-        ]
-        
-        sanitized = text
-        for pattern in secret_patterns:
-            sanitized = re.sub(pattern, '[REDACTED]', sanitized, flags=re.IGNORECASE)
-        
-        sanitized = re.sub(r'\b[A-Z][a-z]+Corp\b', 'Client', sanitized)
-        sanitized = re.sub(r'\b[A-Z][a-z]+Inc\b', 'Customer', sanitized)
-        
-        return sanitized
+        # Text past the limit is dropped rather than passed through unsanitized
+        sanitized = text[:SANITIZE_LIMIT]
+        if _SECRET_HINT_RE.search(sanitized):
+            sanitized = _SECRET_RE.sub('[REDACTED]', sanitized)
+        return _COMPANY_RE.sub(lambda m: 'Client' if m.group(1) == 'Corp' else 'Customer', sanitized)
     
-    def generate_with_openrouter(self, commits_for_content: List[Dict], new_commits: List[Dict], all_commits: List[Dict]) -> Optional[Dict[str, str]]:
+    def generate_with_openrouter(self, new_commits: List[CommitView], older_commits: List[CommitView]) -> Optional[Dict[str, str]]:
         """Generate content using OpenRouter API"""
         if not self.openrouter_api_key:
             return None
@@ -161,38 +319,22 @@ class ContentBot:
             
             # Process new commits (priority)
             for commit in new_commits:
-                commit_date = commit['commit']['author']['date'][:10]
-                commit_msg = commit['commit']['message']
-                
-                lines = commit_msg.split('\n')
-                title = lines[0].strip()
-                body = '\n'.join(lines[1:]).strip() if len(lines) > 1 else ""
-                
-                commit_info = f"[{commit_date}] {title}"
-                if body:
+                commit_info = f"[{commit.date}] {commit.title}"
+                if commit.body:
+                    body = commit.body
                     commit_info += f" - {body[:100]}..." if len(body) > 100 else f" - {body}"
                 
                 new_commit_details.append(commit_info)
             
             # Process older commits for context
-            older_commits = [c for c in all_commits if c not in new_commits]
             for commit in older_commits[:3]:  # Only include 3 older commits for context
-                commit_date = commit['commit']['author']['date'][:10]
-                commit_msg = commit['commit']['message']
-                
-                lines = commit_msg.split('\n')
-                title = lines[0].strip()
-                
-                commit_info = f"[{commit_date}] {title}"
-                commit_details.append(commit_info)
+                commit_details.append(f"[{commit.date}] {commit.title}")
             
             # Combine for prompt
-            if new_commit_details:
-                commits_text = "NEW COMMITS (focus on these):\n" + '\n'.join(new_commit_details)
-                if commit_details:
-                    commits_text += "\n\nOLDER COMMITS (brief context only):\n" + '\n'.join(commit_details)
-            else:
-                commits_text = '\n'.join([c for c in commit_details] + [c for c in new_commit_details])
+            prompt_lines = ["NEW COMMITS (focus on these):", *new_commit_details]
+            if commit_details:
+                prompt_lines += ["", "OLDER COMMITS (brief context only):", *commit_details]
+            commits_text = '\n'.join(prompt_lines)
             
             # Always prioritize new commits heavily (90% focus)
             prompt = f"""Based on these ACTUAL commit messages, create social media posts:
@@ -213,14 +355,32 @@ LINKEDIN: (400-700 chars) Professional post highlighting NEW work primarily, min
 
 CRITICAL: NEW COMMITS are the main story - older commits are just background context."""
             
-            response = client.chat.completions.create(
+            # Stream the completion and stop as soon as both posts are fully captured.
+            # Completeness is only re-checked at line breaks once a LINKEDIN marker
+            # has arrived, so the buffer is rescanned a handful of times, not per delta.
+            buffer = io.StringIO()
+            linkedin_seen = False
+            with client.chat.completions.create(
                 model="anthropic/claude-3.5-sonnet",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=600,
-                temperature=0.8
-            )
+                temperature=0.8,
+                stream=True
+            ) as stream:
+                for chunk in stream:
+                    if not chunk.choices or not chunk.choices[0].delta.content:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    buffer.write(delta)
+                    if '\n' not in delta:
+                        continue
+                    content = buffer.getvalue()
+                    if not linkedin_seen:
+                        linkedin_seen = _LINKEDIN_RE.search(content) is not None
+                    if linkedin_seen and self.sections_complete(content):
+                        break
             
-            content = response.choices[0].message.content
+            content = buffer.getvalue()
             
             
             # Parse the response - robust parsing for different AI model formats
@@ -231,82 +391,118 @@ CRITICAL: NEW COMMITS are the main story - older commits are just background con
             content = content.strip()
             
             # Method 1: Look for explicit TWITTER: and LINKEDIN: markers
-            import re
             
             # Try to find TWITTER: section
-            twitter_match = re.search(r'TWITTER:\s*(.*?)(?=LINKEDIN:|$)', content, re.DOTALL | re.IGNORECASE)
+            twitter_match = _TWITTER_RE.search(content)
             if twitter_match:
                 twitter_version = twitter_match.group(1).strip()
             
             # Try to find LINKEDIN: section  
-            linkedin_match = re.search(r'LINKEDIN:\s*(.*?)(?=TWITTER:|$)', content, re.DOTALL | re.IGNORECASE)
+            linkedin_match = _LINKEDIN_RE.search(content)
             if linkedin_match:
                 linkedin_version = linkedin_match.group(1).strip()
             
             # Method 2: If no explicit markers, try to parse by structure
             if not twitter_version or not linkedin_version:
-                lines = [line.strip() for line in content.split('\n') if line.strip()]
-                
-                # Look for content that looks like social media posts
-                potential_posts = []
-                current_post = ""
-                
-                for line in lines:
-                    # Skip headers and labels
-                    if any(keyword in line.upper() for keyword in ['VERSION', 'CHARS', 'TWITTER', 'LINKEDIN']) and len(line) < 50:
-                        if current_post:
-                            potential_posts.append(current_post.strip())
-                            current_post = ""
-                        continue
-                    
-                    # Skip hashtag-only lines
-                    if line.startswith('#') and len(line.split()) <= 5:
-                        continue
-                    
-                    # Accumulate post content
-                    if current_post:
-                        current_post += " " + line
-                    else:
-                        current_post = line
-                
-                # Add the last post if exists
-                if current_post:
-                    potential_posts.append(current_post.strip())
-                
-                # Assign posts based on length (Twitter is usually shorter)
-                if len(potential_posts) >= 2:
-                    # Sort by length to identify Twitter (shorter) vs LinkedIn (longer)
-                    potential_posts.sort(key=len)
-                    if not twitter_version:
-                        twitter_version = potential_posts[0]
-                    if not linkedin_version:
-                        linkedin_version = potential_posts[-1] if len(potential_posts) > 1 else potential_posts[0]
-                elif len(potential_posts) == 1:
-                    # If only one post found, use it for both (better than nothing)
-                    post = potential_posts[0]
-                    if not twitter_version:
-                        twitter_version = post[:260]  # Truncate for Twitter
-                    if not linkedin_version:
-                        linkedin_version = post
+                shortest_post, longest_post = self._split_posts(content)
+                if not twitter_version:
+                    twitter_version = shortest_post
+                if not linkedin_version:
+                    linkedin_version = longest_post
             
             # Clean up the extracted content
-            twitter_version = re.sub(r'\s+', ' ', twitter_version).strip()
-            linkedin_version = re.sub(r'\s+', ' ', linkedin_version).strip()
+            twitter_version = " ".join(twitter_version.split())
+            linkedin_version = " ".join(linkedin_version.split())
             
             # Remove any remaining labels
-            twitter_version = re.sub(r'^(TWITTER:?|Twitter:?)\s*', '', twitter_version, flags=re.IGNORECASE)
-            linkedin_version = re.sub(r'^(LINKEDIN:?|LinkedIn:?)\s*', '', linkedin_version, flags=re.IGNORECASE)
+            twitter_version = _TWITTER_LABEL_RE.sub('', twitter_version)
+            linkedin_version = _LINKEDIN_LABEL_RE.sub('', linkedin_version)
             
             return {
-                "twitter": twitter_version[:260],  # Ensure within limits
-                "linkedin": linkedin_version[:700]
+                "twitter": twitter_version[:TWITTER_LIMIT],  # Ensure within limits
+                "linkedin": linkedin_version[:LINKEDIN_LIMIT]
             }
             
         except Exception as e:
             typer.echo(f"⚠️ OpenRouter generation failed: {e}")
             return None
     
-    def generate_template_fallback(self, commits: List[Dict]) -> Dict[str, str]:
+    def _iter_posts(self, content: str) -> Iterator[str]:
+        """Yield the posts of an unmarked response, with whitespace collapsed"""
+        words = []
+        
+        # Split on '\n' only; splitlines() would also break on \r, \x0c, \u2028 and friends
+        for line in content.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            
+            # Skip headers and labels; they close the current post
+            if len(line) < 50 and any(keyword in line.upper() for keyword in HEADER_KEYWORDS):
+                if words:
+                    yield " ".join(words)
+                    words = []
+                continue
+            
+            # Skip hashtag-only lines
+            if line.startswith('#') and len(line.split()) <= 5:
+                continue
+            
+            # Accumulate post content
+            words.extend(line.split())
+        
+        # Add the last post if exists
+        if words:
+            yield " ".join(words)
+    
+    def _split_posts(self, content: str) -> Tuple[str, str]:
+        """Split an unmarked response into posts in one pass and return the shortest and longest"""
+        shortest_post = None
+        longest_post = ""
+        
+        for post in self._iter_posts(content):
+            # Ties keep the first shortest and the last longest, like a stable sort by length
+            if shortest_post is None or len(post) < len(shortest_post):
+                shortest_post = post
+            if len(post) >= len(longest_post):
+                longest_post = post
+        
+        return shortest_post or "", longest_post
+    
+    def sections_complete(self, content: str) -> bool:
+        """Check whether a partial response already holds both posts in full.
+        
+        A section is complete once the other marker follows it, or once it
+        is longer than the post limit it will be truncated to anyway.
+        """
+        end = len(content.rstrip())
+        for pattern, limit in ((_TWITTER_RE, TWITTER_LIMIT), (_LINKEDIN_RE, LINKEDIN_LIMIT)):
+            match = pattern.search(content)
+            if not match:
+                return False
+            if match.end(1) >= end and len(" ".join(match.group(1).split())) < limit:
+                return False
+        return True
+    
+    def generation_cache_path(self, commits: List[CommitView]) -> Path:
+        """Cache file for generated posts, keyed on the hash of the sorted commit SHAs"""
+        joined = "|".join(sorted(c.sha for c in commits))
+        key = hashlib.blake2b(joined.encode(), digest_size=16).hexdigest()
+        return self.generation_cache_dir / f"{key}.json"
+    
+    def load_cached_generation(self, commits: List[CommitView]) -> Optional[Dict[str, str]]:
+        """Return posts previously generated for exactly this set of commits"""
+        cache_path = self.generation_cache_path(commits)
+        if cache_path.exists():
+            return orjson.loads(cache_path.read_bytes())
+        return None
+    
+    def save_cached_generation(self, commits: List[CommitView], content: Dict[str, str]) -> None:
+        """Store generated posts for this set of commits"""
+        self.generation_cache_dir.mkdir(exist_ok=True)
+        self.write_json_atomic(self.generation_cache_path(commits), content)
+    
+    def generate_template_fallback(self, commits: List[CommitView]) -> Dict[str, str]:
         commit_count = len(commits)
         
         if commit_count == 0:
@@ -317,7 +513,7 @@ CRITICAL: NEW COMMITS are the main story - older commits are just background con
         
         commit_messages = []
         for commit in commits[:4]:
-            msg = commit['commit']['message'].split('\n')[0]
+            msg = commit.title
             if len(msg) > 60:
                 msg = msg[:57] + "..."
             commit_messages.append(msg)
@@ -327,31 +523,25 @@ CRITICAL: NEW COMMITS are the main story - older commits are just background con
         else:
             twitter_version = f"Productive week with {commit_count} updates! Latest: {commit_messages[0]} 🚀 #coding #development"
         
-        linkedin_version = f"""Recent development progress ({commit_count} commits):
-
-"""
-        
-        for i, msg in enumerate(commit_messages[:3]):
-            linkedin_version += f"• {msg}\n"
+        linkedin_lines = [f"Recent development progress ({commit_count} commits):", ""]
+        linkedin_lines.extend(f"• {msg}" for msg in commit_messages[:3])
         
         if commit_count > 3:
-            linkedin_version += f"• ...and {commit_count - 3} more improvements\n"
+            linkedin_lines.append(f"• ...and {commit_count - 3} more improvements")
         
-        linkedin_version += f"""
-Continuous improvement and feature development in progress! 💪 #development #coding #progress"""
+        linkedin_lines += ["", "Continuous improvement and feature development in progress! 💪 #development #coding #progress"]
+        linkedin_version = "\n".join(linkedin_lines)
         
         return {
-            "twitter": twitter_version[:260],
-            "linkedin": linkedin_version[:700]
+            "twitter": twitter_version[:TWITTER_LIMIT],
+            "linkedin": linkedin_version[:LINKEDIN_LIMIT]
         }
     
     def create_github_issue(self, repo: str, title: str, content: str):
         """Create a GitHub issue with the draft content"""
-        url = f"https://api.github.com/repos/{repo}/issues"
-        headers = {
-            "Authorization": f"token {self.github_token}",
-            "Accept": "application/vnd.github.v3+json"
-        }
+        import requests
+        
+        url = f"{GITHUB_API_URL}/repos/{repo}/issues"
         
         data = {
             "title": title,
@@ -360,21 +550,20 @@ Continuous improvement and feature development in progress! 💪 #development #c
         }
         
         try:
-            response = requests.post(url, headers=headers, json=data)
+            response = self._request_with_backoff("POST", url, json=data)
             response.raise_for_status()
-            issue_data = response.json()
+            issue_data = orjson.loads(response.content)
             typer.echo(f"✅ Created GitHub issue: {issue_data['html_url']}")
         except requests.exceptions.RequestException as e:
             typer.echo(f"⚠️ Failed to create GitHub issue: {e}")
     
     
-    def save_draft(self, content: Dict[str, str], commits: List[Dict]) -> str:
+    def save_draft(self, content: Dict[str, str], commits: List[CommitView], run_date_str: str) -> str:
         """Save draft to markdown file"""
-        today = datetime.now().strftime("%Y-%m-%d")
-        filename = f"draft_{today}.md"
+        filename = f"draft_{run_date_str}.md"
         filepath = self.output_dir / filename
         
-        markdown_content = f"""# Social Media Draft - {today}
+        markdown_parts = [f"""# Social Media Draft - {run_date_str}
 
 ## Twitter/X Version
 {content['twitter']}
@@ -385,16 +574,15 @@ Continuous improvement and feature development in progress! 💪 #development #c
 ---
 
 ## Source Commits ({len(commits)} total)
-"""
+"""]
         
-        for commit in commits[:10]:  # Show up to 10 commits
-            commit_date = commit['commit']['author']['date'][:10]
-            commit_msg = commit['commit']['message'].split('\n')[0]
-            commit_url = commit['html_url']
-            markdown_content += f"- [{commit_date}] {commit_msg} ([view]({commit_url}))\n"
+        markdown_parts.extend(
+            f"- [{commit.date}] {commit.title} ([view]({commit.html_url}))\n"
+            for commit in commits[:10]  # Show up to 10 commits
+        )
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(markdown_content)
+        # Encode once and hand the whole draft to a single binary write
+        filepath.write_bytes("".join(markdown_parts).encode('utf-8'))
         
         return str(filepath)
 
@@ -410,50 +598,65 @@ def main(
     
     bot = ContentBot()
     
-    # Fetch commits
-    all_commits = bot.fetch_commits(repo, days)
-    typer.echo(f"📥 Found {len(all_commits)} total commits")
+    # One timestamp for the whole run: the since window and the draft date
+    run_ts = datetime.now(timezone.utc)
+    run_date_str = run_ts.strftime("%Y-%m-%d")
     
-    # Filter by content
-    filtered_commits = bot.filter_commits_by_content(all_commits)
+    # Fetch only commits since the last run (GitHub applies the filter server-side)
+    window_start = run_ts - timedelta(days=days)
+    since = bot.get_since(window_start)
+    all_commits = bot.fetch_commits(repo, since.isoformat())
+    typer.echo(f"📥 Found {len(all_commits)} total commits")
+    # GitHub's since filters on the committer date, so that is what last_run_at tracks
+    latest_commit_at = max((c['commit']['committer']['date'] for c in all_commits), default=None)
     
-    # Filter by state
-    new_commits = bot.filter_commits_by_state(filtered_commits)
-    typer.echo(f"🆕 Found {len(new_commits)} new commits since last run")
+    # Parse, filter by content and sanitize in a single pass over the commits
+    commits_for_content = [
+        bot._sanitize_commit(commit)
+        for commit in bot._iter_filter_by_content(iter_views(all_commits))
+    ]
+    typer.echo(f"🆕 Found {len(commits_for_content)} new commits since last run")
     
-    if not new_commits:
+    if not commits_for_content:
         typer.echo("✨ No updates this run")
-        bot.save_state()
+        bot.save_state(latest_commit_at)
         return
     
-    # Use new commits for content generation
-    commits_for_content = new_commits
-    
-    # Sanitize commit messages
-    for commit in commits_for_content:
-        commit['commit']['message'] = bot.sanitize_content(commit['commit']['message'])
-    
     # Generate content
     typer.echo("🎨 Generating content...")
-    content = bot.generate_with_openrouter(commits_for_content, new_commits, filtered_commits)
+    content = bot.load_cached_generation(commits_for_content)
     
-    if not content:
-        typer.echo("📝 Using template fallback (OpenRouter not available)")
-        content = bot.generate_template_fallback(commits_for_content)
+    if content:
+        typer.echo("♻️ Reusing content generated earlier for these commits")
     else:
-        typer.echo("🤖 Generated content with OpenRouter")
+        # A few commits from before the last run give the prompt some background
+        older_commits = []
+        if since > window_start:
+            older_commits = [
+                bot._sanitize_commit(commit)
+                for commit in bot._iter_filter_by_content(iter_views(
+                    bot.fetch_context_commits(repo, window_start.isoformat(), bot.last_run_at.isoformat())
+                ))
+            ]
+        content = bot.generate_with_openrouter(commits_for_content, older_commits)
+        
+        if not content:
+            typer.echo("📝 Using template fallback (OpenRouter not available)")
+            content = bot.generate_template_fallback(commits_for_content)
+        else:
+            typer.echo("🤖 Generated content with OpenRouter")
+            bot.save_cached_generation(commits_for_content, content)
     
     # Sanitize generated content
     content['twitter'] = bot.sanitize_content(content['twitter'])
     content['linkedin'] = bot.sanitize_content(content['linkedin'])
     
     # Save draft
-    draft_path = bot.save_draft(content, commits_for_content)
+    draft_path = bot.save_draft(content, commits_for_content, run_date_str)
     typer.echo(f"💾 Saved draft to: {draft_path}")
     
     # Create GitHub issue
-    today = datetime.now().strftime("%Y-%m-%d")
-    issue_title = f"Social Media Draft - {today}"
+    issue_title = f"Social Media Draft - {run_date_str}"
     issue_content = f"""## Twitter/X Version
 {content['twitter']}
 
@@ -461,12 +664,12 @@ def main(
 {content['linkedin']}
 
 ---
-*Generated from {len(new_commits)} commits*"""
+*Generated from {len(commits_for_content)} commits*"""
     
     bot.create_github_issue(repo, issue_title, issue_content)
     
-    # Update state with current timestamp
-    bot.save_state()
+    # Update state with the newest commit date seen this run
+    bot.save_state(latest_commit_at)
     typer.echo("✅ Content bot completed successfully!")
 
 if __name__ == "__main__":